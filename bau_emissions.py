@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -20,51 +21,52 @@ emission_factors = {
 st.title("Business as Usual (BAU) Carbon Emission Calculator")
 st.subheader("Enter your daily usage values below:")
 
-# Input table for default items
-bau_data = pd.DataFrame({
-    "Item": default_items,
-    "Daily Usage (Units)": [0] * len(default_items)
-})
-
-# Collect user inputs using Streamlit widgets
-for i in range(len(bau_data)):
-    bau_data.loc[i, "Daily Usage (Units)"] = st.number_input(
-        f"{bau_data['Item'][i]}:",
+# Collect user inputs using Streamlit widgets, then build the input table in one constructor call
+usages = [
+    st.number_input(
+        f"{item}:",
         min_value=0.0,
         step=0.1,
         value=0.0
     )
+    for item in default_items
+]
+bau_data = pd.DataFrame({
+    "Item": default_items,
+    "Daily Usage (Units)": usages
+})
 
 # Option to add custom items
 st.subheader("Add Custom Items (Optional)")
 if st.checkbox("Add custom items?"):
-    custom_items = []
-    custom_emission_factors = []
-    custom_usages = []
+    custom_rows = []
 
     num_custom_items = st.number_input("How many custom items would you like to add?", min_value=1, step=1, value=1)
     for i in range(num_custom_items):
         item_name = st.text_input(f"Custom Item {i + 1} Name:")
         emission_factor = st.number_input(f"Custom Item {i + 1} Emission Factor (kg CO2e/unit):", min_value=0.0, step=0.01)
         usage = st.number_input(f"Custom Item {i + 1} Daily Usage (Units):", min_value=0.0, step=0.1)
-        custom_items.append(item_name)
-        custom_emission_factors.append(emission_factor)
-        custom_usages.append(usage)
+        # Queue named items only; rows with a blank name are skipped
+        if item_name.strip():
+            custom_rows.append({"Item": item_name, "Daily Usage (Units)": usage})
+            emission_factors[item_name] = emission_factor
 
-    # Add custom items to the DataFrame
-    for i in range(len(custom_items)):
-        bau_data = pd.concat(
-            [bau_data, pd.DataFrame({"Item": [custom_items[i]], "Daily Usage (Units)": [custom_usages[i]]})],
-            ignore_index=True
-        )
-        emission_factors[custom_items[i]] = custom_emission_factors[i]
+    # Add all custom items to the DataFrame with a single concat
+    if custom_rows:
+        bau_data = pd.concat([bau_data, pd.DataFrame(custom_rows)], ignore_index=True)
 
-# Calculate emissions
-bau_data["Emission Factor (kg CO2e/unit)"] = bau_data["Item"].map(emission_factors)
-bau_data["Daily Emissions (kg CO2e)"] = bau_data["Daily Usage (Units)"] * bau_data["Emission Factor (kg CO2e/unit)"]
+# Calculate emissions on NumPy arrays; factors are looked up once (0 for unknown items)
+ef_arr = np.fromiter(
+    (emission_factors.get(name, 0.0) for name in bau_data["Item"]),
+    dtype=np.float64,
+    count=len(bau_data)
+)
+daily_emissions = bau_data["Daily Usage (Units)"].to_numpy(dtype=np.float64) * ef_arr
+bau_data["Emission Factor (kg CO2e/unit)"] = ef_arr
+bau_data["Daily Emissions (kg CO2e)"] = daily_emissions
 
 # Total emissions
-total_emissions_daily = bau_data["Daily Emissions (kg CO2e)"].sum()
+total_emissions_daily = daily_emissions.sum()
 total_emissions_yearly = total_emissions_daily * 365
 
 # Display results
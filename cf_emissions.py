@@ -2,14 +2,23 @@ import pandas as pd
 import streamlit as st
 import numpy as np
 import json
-import altair as alt  # For advanced visualizations
+import re
+import asyncio
 import base64
 from io import BytesIO
 import openai  # For OpenAI API integration
 import importlib.metadata
+from types import MappingProxyType
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import requests
 
 # Import specific exceptions from openai.error instead of openai
-from openai.error import InvalidRequestError, AuthenticationError, RateLimitError, OpenAIError
+from openai.error import (
+    InvalidRequestError, AuthenticationError, RateLimitError, OpenAIError,
+    Timeout, APIConnectionError, ServiceUnavailableError
+)
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 # ----------------------- OpenAI Configuration -----------------------
 # Ensure you have set your OpenAI API key in Streamlit secrets as follows:
@@ -18,6 +27,124 @@ from openai.error import InvalidRequestError, AuthenticationError, RateLimitErro
 
 openai.api_key = st.secrets["OPENAI_API_KEY"]
 
+# ----------------------- Default BAU Items -----------------------
+DEFAULT_ITEMS = (
+    "Gas (kWh/day)",
+    "Electricity (kWh/day)",
+    "Nitrogen (m³/day)",
+    "Hydrogen (m³/day)",
+    "Argon (m³/day)",
+    "Helium (m³/day)"
+)
+
+# Read-only; copied into session state so custom items can be added per session
+DEFAULT_EMISSION_FACTORS = MappingProxyType({
+    "Gas (kWh/day)": 0.182928926,         # kg CO₂e/kWh
+    "Electricity (kWh/day)": 0.207074289, # kg CO₂e/kWh
+    "Nitrogen (m³/day)": 0.090638487,     # kg CO₂e/m³
+    "Hydrogen (m³/day)": 1.07856,         # kg CO₂e/m³
+    "Argon (m³/day)": 6.342950515,        # kg CO₂e/m³
+    "Helium (m³/day)": 0.660501982        # kg CO₂e/m³
+})
+
+# ----------------------- Criteria -----------------------
+# Scale-based (1-10) criteria, including 'Other - Negative Trend'
+SCALE_CRITERIA = frozenset({
+    "Technical Feasibility", 
+    "Supplier Reliability and Technology Readiness", 
+    "Implementation Complexity",
+    "Scalability", 
+    "Maintenance Requirements", 
+    "Regulatory Compliance", 
+    "Risk for Workforce Safety",
+    "Risk for Operations", 
+    "Impact on Product Quality", 
+    "Customer and Stakeholder Alignment",
+    "Priority for our organisation",
+    "Other - Negative Trend"  # For inversion
+})
+
+# Unbounded criteria that are min-max scaled to 1-10 when the model runs
+NORMALIZED_CRITERIA = (
+    "Return on Investment (ROI)(years)",
+    "Initial investment (£)",
+    "Other - Positive Trend",
+    "Other - Negative Trend"
+)
+
+# Normalized criteria where a lower value is better (reverse scaled)
+REVERSE_CRITERIA = frozenset({
+    "Return on Investment (ROI)(years)",
+    "Initial investment (£)",
+    "Other - Negative Trend"
+})
+
+# Traffic-light grading: scores below the first cut are red, between the cuts yellow, from the last cut green
+SCORE_BUCKET_CUTS = np.array([5.0, 7.0])
+SCORE_BUCKET_COLORS = np.array(['red', 'yellow', 'green'])
+
+# Display markers and labels for the traffic-light grades, keyed by bucket color
+SCORE_BUCKET_MARKERS = MappingProxyType({'red': '🔴', 'yellow': '🟡', 'green': '🟢'})
+SCORE_BUCKET_LABELS = MappingProxyType({
+    'red': 'Low (below 5)',
+    'yellow': 'Medium (5 to 7)',
+    'green': 'High (7 and above)'
+})
+
+# Vega-Lite spec for the normalized score bar chart; bars are colored by grade, with a legend naming each score range
+SCORE_CHART_SPEC = MappingProxyType({
+    "mark": "bar",
+    "encoding": {
+        "x": {"field": "Scenario", "type": "nominal", "sort": "-y"},
+        "y": {"field": "Normalized Score", "type": "quantitative"},
+        "color": {
+            "field": "Grade",
+            "type": "nominal",
+            "scale": {
+                "domain": [SCORE_BUCKET_LABELS[color] for color in SCORE_BUCKET_COLORS[::-1]],
+                "range": SCORE_BUCKET_COLORS[::-1].tolist()
+            },
+            "legend": {"title": "Normalized Score"}
+        }
+    },
+    "width": 700,
+    "height": 400,
+    "title": "Scenario Scores (Normalized 1-10)"
+})
+
+# Criteria options with brief, color-coded descriptions for the 1-10 scale criteria
+CRITERIA_OPTIONS = MappingProxyType({
+    "Technical Feasibility": "<span style='color:red;'>1-4: low feasibility</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: high feasibility</span>",
+    "Supplier Reliability and Technology Readiness": "<span style='color:red;'>1-4: unreliable/immature</span>, <span style='color:orange;'>5-6: mostly reliable</span>, <span style='color:green;'>7-10: highly reliable/mature</span>",
+    "Implementation Complexity": "<span style='color:red;'>1-4: very complex</span>, <span style='color:orange;'>5-6: moderate complexity</span>, <span style='color:green;'>7-10: easy to implement</span>",
+    "Scalability": "<span style='color:red;'>1-4: hard to scale</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: easy to scale</span>",
+    "Maintenance Requirements": "<span style='color:red;'>1-4: high maintenance</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: low maintenance</span>",
+    "Regulatory Compliance": "<span style='color:red;'>1-4: risk of non-compliance</span>, <span style='color:orange;'>5-6: mostly compliant</span>, <span style='color:green;'>7-10: fully compliant</span>",
+    "Risk for Workforce Safety": "<span style='color:red;'>1-4: significant safety risks</span>, <span style='color:orange;'>5-6: moderate risks</span>, <span style='color:green;'>7-10: very low risk</span>",
+    "Risk for Operations": "<span style='color:red;'>1-4: high operational risk</span>, <span style='color:orange;'>5-6: moderate risk</span>, <span style='color:green;'>7-10: minimal risk</span>",
+    "Impact on Product Quality": "<span style='color:red;'>1-4: reduces quality</span>, <span style='color:orange;'>5-6: acceptable</span>, <span style='color:green;'>7-10: improves or maintains quality</span>",
+    "Customer and Stakeholder Alignment": "<span style='color:red;'>1-4: low alignment</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: high alignment</span>",
+    "Priority for our organisation": "<span style='color:red;'>1-4: low priority</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: top priority</span>",
+    "Initial investment (£)": "Enter the upfront cost needed (no scale limit).",
+    "Return on Investment (ROI)(years)": "Enter the time (in years) to recover the initial cost (no scale limit).",
+    "Other - Positive Trend": "Enter criteria where a higher number is more beneficial.",
+    "Other - Negative Trend": "Enter criteria where a higher number is less beneficial."
+})
+
+# ----------------------- Scenario Generation Prompt -----------------------
+# Scenario lines are listed as "1. Name: Description"; one pass over the whole response
+SCENARIO_LINE_RE = re.compile(r'^\s*\d+\.\s*([^:\n]+):[ \t]*(.*?)\s*$', re.MULTILINE)
+
+# Scenario generation prompt; filled in per request with str.format
+SCENARIO_SYSTEM_PROMPT = "You are an expert sustainability analyst."
+SCENARIO_PROMPT_TEMPLATE = (
+    "Based on the following description of an organization's activities and sustainability goals, "
+    "generate {num_scenarios} detailed sustainability scenarios. "
+    "Each scenario should include a name and a brief description.\n\n"
+    "Description:\n{description}\n\n"
+    "Scenarios:"
+)
+
 # ----------------------- Helper Functions -----------------------
 def get_openai_version_importlib():
     try:
@@ -26,6 +153,37 @@ def get_openai_version_importlib():
     except importlib.metadata.PackageNotFoundError:
         return "Package not found."
 
+def rank_descending(values):
+    """
+    Ranks values from highest (1) to lowest, giving tied values the lowest shared rank (pandas method='min').
+    Args:
+        values (np.ndarray): 1-D array of scores.
+    Returns:
+        tuple: (ranks, order) where ranks are integer ranks in the original order and
+            order holds the positions sorted from highest to lowest (stable for ties).
+    """
+    negated = -np.asarray(values, dtype=np.float64)
+    order = np.argsort(negated, kind="stable")
+    sorted_negated = negated[order]
+    ranks = np.empty(len(order), dtype=np.int64)
+    # The first position of each value in sorted order is its 'min' rank
+    ranks[order] = np.searchsorted(sorted_negated, sorted_negated, side="left") + 1
+    return ranks, order
+
+@st.cache_data(show_spinner=False)
+def dataframe_to_csv_bytes(df):
+    """
+    Encodes a DataFrame as CSV bytes using pyarrow's multi-threaded CSV writer.
+    Cached so unchanged results are not re-encoded on every rerun.
+    Args:
+        df (pd.DataFrame): DataFrame to encode (the index is dropped).
+    Returns:
+        bytes: CSV-encoded data.
+    """
+    buf = BytesIO()
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+    return buf.getvalue()
+
 # Removed pkg_resources related functions
 
 # ----------------------- Test OpenAI Linkage -----------------------
@@ -70,6 +228,45 @@ def save_session_state():
     }
     return state
 
+def update_emission_factor_lookup():
+    """
+    Rebuilds the item-to-index map and the parallel emission factor array from the session's emission factors.
+    The array ends with a 0.0 sentinel so that unknown items (index -1) look up a zero factor.
+    """
+    factors = st.session_state.emission_factors
+    st.session_state.item_index = {item: i for i, item in enumerate(factors)}
+    st.session_state.emission_factor_array = np.append(
+        np.fromiter(factors.values(), dtype=np.float64, count=len(factors)),
+        0.0
+    )
+
+def initialize_session_state():
+    """
+    Populates the session state with default values for any keys that are not yet set.
+    """
+    if 'bau_data' not in st.session_state:
+        st.session_state.bau_data = pd.DataFrame({
+            "Item": list(DEFAULT_ITEMS),
+            "Daily Usage (Units)": np.zeros(len(DEFAULT_ITEMS))
+        })
+        st.session_state.emission_factors = dict(DEFAULT_EMISSION_FACTORS)
+        update_emission_factor_lookup()
+    
+    if 'scenario_desc_df' not in st.session_state:
+        st.session_state.scenario_desc_df = pd.DataFrame(columns=["Scenario", "Description"])
+    
+    if 'criteria_df' not in st.session_state:
+        st.session_state.criteria_df = pd.DataFrame(columns=["Scenario"])
+    
+    if 'selected_criteria' not in st.session_state:
+        st.session_state.selected_criteria = []
+    
+    if 'proposed_scenarios' not in st.session_state:
+        st.session_state.proposed_scenarios = []
+    
+    if 'ai_proposed' not in st.session_state:
+        st.session_state.ai_proposed = False
+
 def load_session_state(uploaded_file):
     """
     Deserializes the uploaded JSON file and updates the session state variables.
@@ -87,6 +284,7 @@ def load_session_state(uploaded_file):
         
         # Load Emission Factors
         st.session_state.emission_factors = data['emission_factors']
+        update_emission_factor_lookup()
         
         # Load Scenario Descriptions
         scenario_desc_loaded = pd.read_json(data['scenario_desc_df'])
@@ -108,6 +306,91 @@ def load_session_state(uploaded_file):
         st.error(f"Failed to load progress: {e}")
 
 # ----------------------- OpenAI Scenario Generation -----------------------
+@retry(
+    retry=retry_if_exception_type((RateLimitError, Timeout, APIConnectionError, ServiceUnavailableError)),
+    wait=wait_exponential(multiplier=1, min=1, max=20),
+    stop=stop_after_attempt(4),
+    reraise=True
+)
+async def chat_completion_async(messages, max_tokens, stop_when, temperature=0.7):
+    """
+    Streams a chat completion through the async OpenAI client, cutting generation off early.
+    Rate-limit, timeout and connection errors are retried with exponential backoff.
+    Args:
+        messages (list of dict): Chat messages to send.
+        max_tokens (int): Maximum number of tokens to generate.
+        stop_when (callable): Generation is cut off as soon as stop_when(text_so_far) returns True.
+        temperature (float): Sampling temperature.
+    Returns:
+        str: The stripped content of the first choice.
+    """
+    response = await openai.ChatCompletion.acreate(
+        model="gpt-3.5-turbo",
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True,
+    )
+    content = ""
+    try:
+        async for chunk in response:
+            content += chunk.choices[0].delta.get("content", "")
+            if stop_when(content):
+                break  # Closing the stream stops further generation
+    finally:
+        await response.aclose()
+    return content.strip()
+
+def build_scenario_messages(description, num_scenarios):
+    """
+    Builds the chat messages asking the model for sustainability scenarios.
+    Args:
+        description (str): The activities description input by the user.
+        num_scenarios (int): The number of scenarios to generate.
+    Returns:
+        list of dict: Chat messages.
+    """
+    prompt = SCENARIO_PROMPT_TEMPLATE.format(num_scenarios=num_scenarios, description=description)
+    return [
+        {"role": "system", "content": SCENARIO_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def parse_scenarios(scenarios_text):
+    """
+    Parses the model output into a list of scenarios.
+    Args:
+        scenarios_text (str): Raw model output, one "1. Name: Description" entry per line.
+    Returns:
+        list of dict: Scenarios with 'name' and 'description'.
+    """
+    return [
+        {"name": name.strip(), "description": desc.strip()}
+        for name, desc in SCENARIO_LINE_RE.findall(scenarios_text)
+    ]
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def cached_scenario_completion(description, num_scenarios):
+    """
+    Returns the model's raw scenario text, reusing the response for an identical description and count for an hour.
+    Failed calls raise and are therefore not cached.
+    Args:
+        description (str): The activities description input by the user.
+        num_scenarios (int): The number of scenarios to generate.
+    Returns:
+        str: Raw model output.
+    """
+    def has_all_scenarios(text):
+        # Only count lines that are complete, so the last description is not cut short
+        complete_lines = text[:text.rfind("\n") + 1]
+        return len(SCENARIO_LINE_RE.findall(complete_lines)) >= num_scenarios
+
+    return asyncio.run(chat_completion_async(
+        build_scenario_messages(description, num_scenarios),
+        max_tokens=500,
+        stop_when=has_all_scenarios
+    ))
+
 def generate_scenarios(description, num_scenarios):
     """
     Uses OpenAI's GPT model to generate scenario suggestions based on the activities description.
@@ -117,39 +400,9 @@ def generate_scenarios(description, num_scenarios):
     Returns:
         list of dict: Generated scenarios with 'name' and 'description'.
     """
-    prompt = (
-        f"Based on the following description of an organization's activities and sustainability goals, "
-        f"generate {num_scenarios} detailed sustainability scenarios. "
-        f"Each scenario should include a name and a brief description.\n\n"
-        f"Description:\n{description}\n\n"
-        f"Scenarios:"
-    )
-    
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # You can choose a different model if desired
-            messages=[
-                {"role": "system", "content": "You are an expert sustainability analyst."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.7,
-        )
-        # Use attribute access instead of dict-style
-        scenarios_text = response.choices[0].message.content.strip()
-        # Split scenarios based on numbering
-        scenarios = []
-        for scenario in scenarios_text.split('\n'):
-            if scenario.strip() == "":
-                continue
-            # Assuming scenarios are listed as "1. Name: Description"
-            if '.' in scenario:
-                parts = scenario.split('.', 1)
-                name_desc = parts[1].strip()
-                if ':' in name_desc:
-                    name, desc = name_desc.split(':', 1)
-                    scenarios.append({"name": name.strip(), "description": desc.strip()})
-        return scenarios
+        scenarios_text = cached_scenario_completion(description, num_scenarios)
+        return parse_scenarios(scenarios_text)
     except OpenAIError as e:
         st.error(f"OpenAI API Error: {e}")
         return []
@@ -157,21 +410,217 @@ def generate_scenarios(description, num_scenarios):
         st.error(f"Unexpected error: {e}")
         return []
 
+# ----------------------- OpenAI Batch Scenario Generation -----------------------
+def _openai_headers():
+    return {"Authorization": f"Bearer {openai.api_key}"}
+
+def submit_scenario_batch(description, num_scenarios):
+    """
+    Queues a scenario-generation request on the OpenAI Batch API.
+    Batch requests are cheaper and complete within 24 hours, without blocking the app.
+    Args:
+        description (str): The activities description input by the user.
+        num_scenarios (int): The number of scenarios to generate.
+    Returns:
+        str or None: The batch id, or None if the submission failed.
+    """
+    request_line = {
+        "custom_id": "scenarios",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": "gpt-3.5-turbo",
+            "messages": build_scenario_messages(description, num_scenarios),
+            "max_tokens": 500,
+            "temperature": 0.7
+        }
+    }
+    try:
+        input_file = openai.File.create(
+            file=BytesIO((json.dumps(request_line) + "\n").encode()),
+            purpose="batch",
+            user_provided_filename="scenario_batch.jsonl"
+        )
+        response = requests.post(
+            f"{openai.api_base}/batches",
+            headers=_openai_headers(),
+            json={
+                "input_file_id": input_file.id,
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h"
+            },
+            timeout=30
+        )
+        response.raise_for_status()
+        return response.json()["id"]
+    except (OpenAIError, requests.RequestException) as e:
+        st.error(f"Failed to queue scenario batch: {e}")
+        return None
+
+def retrieve_scenario_batch(batch_id):
+    """
+    Checks a queued scenario batch and, once it has completed, parses its output.
+    Args:
+        batch_id (str): The id returned by submit_scenario_batch.
+    Returns:
+        tuple: (status, scenarios) where scenarios is a list of dict, or None until the batch has completed.
+    """
+    try:
+        response = requests.get(f"{openai.api_base}/batches/{batch_id}", headers=_openai_headers(), timeout=30)
+        response.raise_for_status()
+        batch = response.json()
+        if batch["status"] != "completed" or not batch.get("output_file_id"):
+            return batch["status"], None
+
+        output = openai.File.download(batch["output_file_id"]).decode()
+        scenarios = []
+        for line in output.splitlines():
+            if line.strip() == "":
+                continue
+            result = json.loads(line)["response"]["body"]
+            scenarios.extend(parse_scenarios(result["choices"][0]["message"]["content"].strip()))
+        return batch["status"], scenarios
+    except (OpenAIError, requests.RequestException, KeyError, ValueError) as e:
+        st.error(f"Failed to retrieve scenario batch: {e}")
+        return "error", None
+
+# ----------------------- Scenario Emissions -----------------------
+@st.cache_data(show_spinner=False)
+def compute_scenario_emissions(scenario_names, bau_daily_by_item, percent_block, total_annual_bau):
+    """
+    Computes daily and annual emissions and the CO₂ savings against BAU for every scenario.
+    Cached on the numeric inputs, so reruns from unrelated widgets reuse the previous results.
+    Args:
+        scenario_names (list of str): Scenario names, one per column of percent_block.
+        bau_daily_by_item (np.ndarray): BAU daily emissions per item (kg CO₂e).
+        percent_block (np.ndarray): Usage percentages relative to BAU (items x scenarios).
+        total_annual_bau (float): Total annual BAU emissions (kg CO₂e).
+    Returns:
+        pd.DataFrame: Scenario results indexed from 1.
+    """
+    # All scenarios at once: (items,) @ (items x scenarios)
+    scenario_daily_emissions = bau_daily_by_item @ (percent_block / 100.0)
+    scenario_annual_emissions = scenario_daily_emissions * 365
+    co2_saving_kg = total_annual_bau - scenario_annual_emissions
+
+    # Percentage savings; 0% when the BAU total is zero
+    co2_saving_pct = np.divide(
+        co2_saving_kg,
+        total_annual_bau,
+        out=np.zeros_like(co2_saving_kg),
+        where=total_annual_bau != 0
+    ) * 100.0
+
+    return pd.DataFrame({
+        "Scenario": scenario_names,
+        "Total Daily Emissions (kg CO₂e)": scenario_daily_emissions,
+        "Total Annual Emissions (kg CO₂e)": scenario_annual_emissions,
+        "CO₂ Saving (kg CO₂e/year)": co2_saving_kg,
+        "CO₂ Saving (%)": co2_saving_pct
+    }, index=range(1, len(scenario_names) + 1))
+
+# ----------------------- Scenario Scoring -----------------------
+@st.cache_data(show_spinner=False)
+def score_scenarios(scenario_names, criteria_names, criteria_values, selected_criteria):
+    """
+    Scales the criteria to 1-10, then totals, normalizes, colors and ranks each scenario.
+    Cached on the criteria values and selection, so unchanged inputs skip the whole pipeline.
+    Args:
+        scenario_names (list of str): Scenario names, one per row of criteria_values.
+        criteria_names (list of str): Criterion names, one per column of criteria_values.
+        criteria_values (np.ndarray): Float64 criteria values (scenarios x criteria).
+        selected_criteria (list of str): The criteria to include in the total score.
+    Returns:
+        tuple: (scaled_criteria_df, rank_order) where scaled_criteria_df holds the scaled criteria with
+            'Total Score', 'Normalized Score', 'Color' and 'Rank' columns, and rank_order lists its row
+            positions from best to worst.
+    """
+    # Work on one float64 block (scenarios x criteria); the DataFrame is only built for display
+    criteria_cols = pd.Index(criteria_names)
+    block = np.array(criteria_values, dtype=np.float64, copy=True)
+
+    # Scale every normalized criterion present in one broadcast over its sub-block
+    present_norm_cols = [crit for crit in NORMALIZED_CRITERIA if crit in criteria_cols]
+    if present_norm_cols:
+        norm_idx = criteria_cols.get_indexer(present_norm_cols)
+        sub = block[:, norm_idx]
+
+        min_val = sub.min(axis=0, keepdims=True)
+        max_val = sub.max(axis=0, keepdims=True)
+        value_range = max_val - min_val
+        flat = value_range == 0
+        unit = np.divide(sub - min_val, value_range, out=np.zeros_like(sub), where=~flat)
+
+        # Lower is better for the reverse criteria (ROI, investment, negative trend)
+        reverse = np.fromiter((crit in REVERSE_CRITERIA for crit in present_norm_cols), dtype=bool, count=len(present_norm_cols))
+        scaled_values = np.where(reverse, 10 - 9 * unit, 1 + 9 * unit)
+        # A constant column scores 10, or 0 when it is all zeros
+        block[:, norm_idx] = np.where(flat, np.where(min_val != 0, 10.0, 0.0), scaled_values)
+
+    # Calculate the total score by summing all criteria as one contiguous ndarray reduction
+    total_values = block[:, criteria_cols.get_indexer(selected_criteria)].sum(axis=1)
+
+    # Normalize the total scores between 1 and 10
+    min_score = total_values.min()
+    score_range = np.ptp(total_values)
+    if score_range != 0:
+        normalized_values = 1 + 9 * (total_values - min_score) / score_range
+    else:
+        normalized_values = np.full_like(total_values, 5.0)  # Assign a neutral score if all scores are equal
+
+    ranks, rank_order = rank_descending(normalized_values)
+
+    # Bucket the scores once; the table and the chart both take their colors from it
+    score_buckets = np.searchsorted(SCORE_BUCKET_CUTS, normalized_values, side='right')
+
+    # Wrap the block once, then attach total, normalized score, color and rank in a single pipeline step.
+    # Scores are computed in float64 but only displayed, so the frame carries float32/int16 and a
+    # categorical Scenario to halve what is serialized to the front end.
+    scaled_criteria_df = pd.DataFrame(block.astype(np.float32), columns=criteria_cols)
+    scaled_criteria_df.insert(0, 'Scenario', pd.Categorical(scenario_names))
+    scaled_criteria_df = scaled_criteria_df.assign(**{
+        'Total Score': total_values.astype(np.float32),
+        'Normalized Score': normalized_values.astype(np.float32),
+        'Color': SCORE_BUCKET_COLORS[score_buckets],
+        'Rank': ranks.astype(np.int16)
+    })
+
+    # Arrow-backed columns let Streamlit hand the buffers to the front end without another pandas-to-Arrow copy
+    # (convert_integer=False keeps whole-number scores as floats)
+    return scaled_criteria_df.convert_dtypes(dtype_backend='pyarrow', convert_integer=False), rank_order
+
+def build_score_chart_spec(score_records):
+    """
+    Builds the Vega-Lite spec for the normalized score bar chart from the prebuilt SCORE_CHART_SPEC.
+    Args:
+        score_records (tuple of tuple): (scenario name, normalized score, color) records.
+    Returns:
+        dict: Vega-Lite chart specification with the records inlined.
+    """
+    # Inline records go straight into the spec, skipping the DataFrame schema inference and conversion
+    records = [
+        {'Scenario': scenario, 'Normalized Score': float(score), 'Grade': SCORE_BUCKET_LABELS[color]}
+        for scenario, score, color in score_records
+    ]
+    return {**SCORE_CHART_SPEC, "data": {"values": records}}
+
 # ----------------------- Main Application -----------------------
 def main():
     # Set page configuration
     st.set_page_config(page_title="Sustainability Decision Assistant", layout="wide")
     
-    # Display OpenAI package version using importlib.metadata
-    st.sidebar.write("### OpenAI Package Version (importlib.metadata)")
-    openai_version = get_openai_version_importlib()
-    st.sidebar.write(f"**Installed OpenAI Version:** {openai_version}")
+    # Display OpenAI package version using importlib.metadata (collapsed; only expanded on demand)
+    with st.sidebar.expander("Debug info", expanded=False):
+        st.write("### OpenAI Package Version (importlib.metadata)")
+        openai_version = get_openai_version_importlib()
+        st.write(f"**Installed OpenAI Version:** {openai_version}")
     
     # Optionally, display the OpenAI package version in the main app for verification
     # st.write(f"OpenAI package version: {openai.__version__}")
     
-    # Test OpenAI Linkage
-    test_openai_linkage()
+    # Test OpenAI Linkage only on request, so reruns from other widgets make no API call
+    if st.sidebar.button("Test OpenAI Connection"):
+        test_openai_linkage()
 
     # Main Title and Description
     st.title("Sustainability Decision Assistant")
@@ -198,60 +647,44 @@ def main():
 
     # ----------------------- Initialize Session State -----------------------
 
-    if 'bau_data' not in st.session_state:
-        default_items = [
-            "Gas (kWh/day)", 
-            "Electricity (kWh/day)", 
-            "Nitrogen (m³/day)", 
-            "Hydrogen (m³/day)", 
-            "Argon (m³/day)", 
-            "Helium (m³/day)"
-        ]
-        emission_factors = {
-            "Gas (kWh/day)": 0.182928926,         # kg CO₂e/kWh
-            "Electricity (kWh/day)": 0.207074289, # kg CO₂e/kWh
-            "Nitrogen (m³/day)": 0.090638487,     # kg CO₂e/m³
-            "Hydrogen (m³/day)": 1.07856,         # kg CO₂e/m³
-            "Argon (m³/day)": 6.342950515,        # kg CO₂e/m³
-            "Helium (m³/day)": 0.660501982        # kg CO₂e/m³
-        }
-        st.session_state.bau_data = pd.DataFrame({
-            "Item": default_items,
-            "Daily Usage (Units)": [0.0] * len(default_items)
-        })
-        st.session_state.emission_factors = emission_factors.copy()
-    
-    if 'scenario_desc_df' not in st.session_state:
-        st.session_state.scenario_desc_df = pd.DataFrame(columns=["Scenario", "Description"])
-    
-    if 'criteria_df' not in st.session_state:
-        st.session_state.criteria_df = pd.DataFrame(columns=["Scenario"])
-    
-    if 'selected_criteria' not in st.session_state:
-        st.session_state.selected_criteria = []
-    
-    if 'proposed_scenarios' not in st.session_state:
-        st.session_state.proposed_scenarios = []
-    
-    if 'ai_proposed' not in st.session_state:
-        st.session_state.ai_proposed = False
+    # Defaults only need populating on the first run of a session
+    if not st.session_state.get('_initialized'):
+        initialize_session_state()
+        st.session_state._initialized = True
 
     # ----------------------- BAU Inputs -----------------------
 
     st.subheader("Enter Daily Usage for Business As Usual (BAU)")
 
-    # Display BAU Inputs
-    bau_data = st.session_state.bau_data
-    emission_factors = st.session_state.emission_factors
-
-    for i in range(len(bau_data)):
-        bau_data.loc[i, "Daily Usage (Units)"] = st.number_input(
-            f"{bau_data['Item'][i]}:",
+    # Display BAU Inputs as a single editable table
+    bau_column_config = {
+        "Item": st.column_config.TextColumn(
+            "Item",
+            disabled=True  # Item names are fixed; only usage is editable
+        ),
+        "Daily Usage (Units)": st.column_config.NumberColumn(
+            "Daily Usage (Units)",
             min_value=0.0,
             step=0.1,
-            value=bau_data.loc[i, "Daily Usage (Units)"],
-            key=f"bau_usage_{i}"
+            format="%.2f",
+            required=True  # A usage cell cannot be left empty
         )
+    }
+    # Batch BAU edits in a form so the app reruns once per submit instead of on every cell edit
+    with st.form("bau_form"):
+        try:
+            bau_data = st.data_editor(
+                st.session_state.bau_data,
+                use_container_width=True,
+                key="bau_editor",
+                num_rows="fixed",
+                column_config=bau_column_config,
+                hide_index=True
+            )
+        except AttributeError:
+            bau_data = st.experimental_data_editor(st.session_state.bau_data, use_container_width=True, key="bau_editor")
+        st.form_submit_button("Update BAU")
+    st.session_state.bau_data = bau_data
     
     # Option to add custom items
     st.subheader("Add Custom Items (Optional)")
@@ -264,6 +697,9 @@ def main():
             value=1,
             key="num_custom_items_input"
         )
+        existing_items = set(bau_data["Item"])
+        new_rows = []
+        new_emission_factors = {}
         for i in range(int(num_custom_items)):
             item_name = st.text_input(
                 f"Custom Item {i + 1} Name:",
@@ -283,52 +719,81 @@ def main():
                 value=0.0,
                 key=f"custom_usage_{i}"
             )
-            # Add to BAU Data if item name is provided and not duplicate
+            # Queue for BAU Data if item name is provided and not duplicate
             if item_name.strip() != "":
-                if item_name.strip() not in bau_data["Item"].values:
-                    new_row = pd.DataFrame({"Item": [item_name.strip()], "Daily Usage (Units)": [usage]})
-                    st.session_state.bau_data = pd.concat([bau_data, new_row], ignore_index=True)
-                    st.session_state.emission_factors[item_name.strip()] = emission_factor
-                    # Update 'bau_data' variable to include new row
-                    bau_data = st.session_state.bau_data
+                if item_name.strip() not in existing_items:
+                    new_rows.append({"Item": item_name.strip(), "Daily Usage (Units)": usage})
+                    new_emission_factors[item_name.strip()] = emission_factor
+                    existing_items.add(item_name.strip())
                 else:
                     st.warning(f"Item '{item_name.strip()}' already exists.")
 
-    # Fill missing emission factors in the DataFrame
-    bau_data = st.session_state.bau_data.copy()
-    bau_data["Emission Factor (kg CO₂e/unit)"] = bau_data["Item"].map(st.session_state.emission_factors).fillna(0.0)
+        # Append all new items with a single concat instead of one per item
+        if new_rows:
+            st.session_state.bau_data = pd.concat([bau_data, pd.DataFrame(new_rows)], ignore_index=True)
+            st.session_state.emission_factors.update(new_emission_factors)
+            update_emission_factor_lookup()
+            bau_data = st.session_state.bau_data
+
+    # Only recompute BAU emissions and ordering when the items, usage or emission factors changed
+    items = st.session_state.bau_data["Item"].to_numpy()
+    # Treat any empty usage cell as zero, as load_session_state does
+    usage = np.nan_to_num(st.session_state.bau_data["Daily Usage (Units)"].to_numpy(dtype=np.float64), nan=0.0)
+    bau_signature = (
+        tuple(items),
+        usage.tobytes(),
+        tuple(st.session_state.item_index),
+        st.session_state.emission_factor_array.tobytes()
+    )
+    if st.session_state.get('bau_signature') != bau_signature:
+        # Look up emission factors (0 for missing items) with one gather from the cached factor array
+        item_index = st.session_state.item_index
+        emission_factor_values = st.session_state.emission_factor_array[
+            np.fromiter((item_index.get(item, -1) for item in items), dtype=np.int64, count=len(items))
+        ]
 
-    # Calculate emissions for BAU
-    bau_data["Daily Emissions (kg CO₂e)"] = bau_data["Daily Usage (Units)"] * bau_data["Emission Factor (kg CO₂e/unit)"]
-    bau_data["Annual Emissions (kg CO₂e)"] = bau_data["Daily Emissions (kg CO₂e)"] * 365
+        # Calculate emissions for BAU and attach all derived columns in one pass
+        daily_emissions = usage * emission_factor_values
+        bau_data = st.session_state.bau_data.assign(**{
+            "Emission Factor (kg CO₂e/unit)": emission_factor_values,
+            "Daily Emissions (kg CO₂e)": daily_emissions,
+            "Annual Emissions (kg CO₂e)": daily_emissions * 365
+        })
 
-    # ----------------------- Ensure BAU Graph Maintains Input Order -----------------------
+        # ----------------------- Ensure BAU Graph Maintains Input Order -----------------------
 
-    # Reorder bau_data to ensure default items come first, followed by custom items
-    default_items = [
-        "Gas (kWh/day)", 
-        "Electricity (kWh/day)", 
-        "Nitrogen (m³/day)", 
-        "Hydrogen (m³/day)", 
-        "Argon (m³/day)", 
-        "Helium (m³/day)"
-    ]
-    custom_items = bau_data[~bau_data["Item"].isin(default_items)]
-    bau_data_ordered = pd.concat([bau_data[bau_data["Item"].isin(default_items)], custom_items], ignore_index=True)
+        # Reorder bau_data to ensure default items come first, followed by custom items
+        # Default items sort by their position in DEFAULT_ITEMS; custom items (code -1) go last in input order
+        item_codes = pd.Index(DEFAULT_ITEMS).get_indexer(bau_data["Item"])
+        sort_key = np.where(item_codes >= 0, item_codes, len(DEFAULT_ITEMS))
+        bau_data_ordered = bau_data.iloc[np.argsort(sort_key, kind="stable")].reset_index(drop=True)
+
+        # Convert 'Item' to a categorical type to preserve order in the bar chart
+        bau_data_ordered['Item'] = pd.Categorical(bau_data_ordered['Item'], categories=bau_data_ordered['Item'], ordered=True)
 
-    # Convert 'Item' to a categorical type to preserve order in the bar chart
-    bau_data_ordered['Item'] = pd.Categorical(bau_data_ordered['Item'], categories=bau_data_ordered['Item'], ordered=True)
+        # Stash the BAU arrays and total once so the scenario calculations read them without re-indexing
+        st.session_state['bau_items'] = bau_data_ordered['Item'].to_numpy()
+        st.session_state['bau_daily_by_item'] = bau_data_ordered['Daily Emissions (kg CO₂e)'].to_numpy(dtype=np.float64)
+        st.session_state['total_annual_bau'] = float(bau_data_ordered['Annual Emissions (kg CO₂e)'].to_numpy(dtype=np.float64).sum())
+        st.session_state['bau_data_ordered'] = bau_data_ordered
+        st.session_state['bau_signature'] = bau_signature
+
+    bau_data_ordered = st.session_state.bau_data_ordered
 
     # Display BAU summary
     st.write("### BAU Results")
-    total_daily_bau = bau_data_ordered['Daily Emissions (kg CO₂e)'].sum()
-    total_annual_bau = bau_data_ordered['Annual Emissions (kg CO₂e)'].sum()
+    total_daily_bau = st.session_state.bau_daily_by_item.sum()
+    total_annual_bau = st.session_state.total_annual_bau
 
     st.write(f"**Total Daily Emissions (BAU):** {total_daily_bau:.2f} kg CO₂e/day")
     st.write(f"**Total Annual Emissions (BAU):** {total_annual_bau:.2f} kg CO₂e/year")
 
-    # Visualize BAU emissions with preserved order
-    st.bar_chart(bau_data_ordered.set_index("Item")["Daily Emissions (kg CO₂e)"], use_container_width=True)
+    # Visualize BAU emissions with preserved order; ship only the two plotted columns (no set_index copy)
+    bau_chart_data = pd.DataFrame({
+        "Item": bau_data_ordered["Item"],
+        "Daily Emissions (kg CO₂e)": bau_data_ordered["Daily Emissions (kg CO₂e)"].to_numpy()
+    })
+    st.bar_chart(bau_chart_data, x="Item", y="Daily Emissions (kg CO₂e)", use_container_width=True)
 
     # ----------------------- Describe Activities to Propose Scenarios -----------------------
 
@@ -359,16 +824,35 @@ def main():
             with st.spinner("Generating scenarios..."):
                 generated_scenarios = generate_scenarios(activities_description, int(num_scenarios))
                 if generated_scenarios:
-                    # Create a DataFrame for scenario descriptions
-                    scenario_desc_columns = ["Scenario", "Description"]
-                    scenario_desc_data = [[scenario['name'], scenario['description']] for scenario in generated_scenarios]
-                    scenario_desc_df = pd.DataFrame(scenario_desc_data, columns=scenario_desc_columns)
-                    
-                    # Update the session state with generated scenarios
-                    st.session_state.edited_scenario_desc_df = scenario_desc_df
+                    # Keep the generated scenarios; they seed the scenario description table below
+                    st.session_state.proposed_scenarios = generated_scenarios
                     st.success("Scenarios generated successfully! You can now review and edit them as needed.")
                 else:
                     st.error("No scenarios were generated. Please try again or enter a more detailed description.")
+
+        # Non-interactive alternative: queue the request on the cheaper Batch API (completes within 24h)
+        if st.button("Queue Scenarios (Batch)"):
+            batch_id = submit_scenario_batch(activities_description, 3)  # Same default as the interactive generator
+            if batch_id:
+                st.session_state.scenario_batch_id = batch_id
+                st.success(f"Scenario batch queued (id: {batch_id}). Check back later for the results.")
+
+        if st.session_state.get('scenario_batch_id'):
+            if st.button("Check Batch Status"):
+                status, batch_scenarios = retrieve_scenario_batch(st.session_state.scenario_batch_id)
+                if batch_scenarios:
+                    # The scenarios are kept in session state, so the batch id is no longer needed
+                    st.session_state.proposed_scenarios = batch_scenarios
+                    st.session_state.scenario_batch_id = None
+                    st.success("Batch scenarios retrieved successfully! You can now review and edit them as needed.")
+                elif status == "completed":
+                    st.error("The batch completed but no scenarios could be parsed.")
+                    st.session_state.scenario_batch_id = None
+                elif status in ("failed", "expired", "cancelled"):
+                    st.error(f"The scenario batch {status} without results. Please queue it again.")
+                    st.session_state.scenario_batch_id = None
+                elif status != "error":
+                    st.info(f"Batch status: {status}")
     
     
 
@@ -391,9 +875,11 @@ def main():
         key="num_scenarios_input_2"
     )
 
-    # Create a DataFrame for scenario descriptions
+    # Create a DataFrame for scenario descriptions, starting from any generated scenarios
     scenario_desc_columns = ["Scenario", "Description"]
-    scenario_desc_data = [[f"Scenario {i+1}", ""] for i in range(int(num_scenarios))]
+    proposed_scenarios = st.session_state.get('proposed_scenarios', [])
+    scenario_desc_data = [[scenario['name'], scenario['description']] for scenario in proposed_scenarios]
+    scenario_desc_data += [[f"Scenario {i+1}", ""] for i in range(len(scenario_desc_data), int(num_scenarios))]
     scenario_desc_df = pd.DataFrame(scenario_desc_data, columns=scenario_desc_columns)
 
     st.write("Please describe each scenario. Double-click a cell to edit the description.")
@@ -407,10 +893,20 @@ def main():
     # Save edited scenario descriptions to session state
     st.session_state['edited_scenario_desc_df'] = edited_scenario_desc_df
 
-    # Create a DataFrame with one column per scenario
-    scenario_columns = ["Item"] + [f"{row['Scenario']} (%)" for index, row in edited_scenario_desc_df.iterrows()]
-    scenario_data = [[item] + [100.0]*int(num_scenarios) for item in bau_data_ordered["Item"]]
-    scenario_df = pd.DataFrame(scenario_data, columns=scenario_columns)
+    # Create a DataFrame with one column per scenario, rebuilt only when the items or scenario names change
+    scenario_df_signature = (tuple(st.session_state.bau_items), tuple(edited_scenario_desc_df["Scenario"]))
+    if st.session_state.get('scenario_df_signature') == scenario_df_signature:
+        scenario_df = st.session_state.scenario_df_cache
+    else:
+        scenario_columns = [f"{scenario} (%)" for scenario in edited_scenario_desc_df["Scenario"].to_numpy()]
+        # Every item starts at 100% (BAU) in every scenario; build the typed block directly
+        scenario_df = pd.DataFrame(
+            np.full((len(bau_data_ordered), len(scenario_columns)), 100.0, dtype=np.float64),
+            columns=scenario_columns
+        )
+        scenario_df.insert(0, "Item", st.session_state.bau_items)
+        st.session_state.scenario_df_signature = scenario_df_signature
+        st.session_state.scenario_df_cache = scenario_df
 
     st.write("""
         Assign usage percentages to each scenario for each BAU item. These percentages are relative to the BAU.
@@ -419,49 +915,45 @@ def main():
     
     """)
 
-    # Editable table for scenario percentages
-    try:
-        edited_scenario_df = st.data_editor(scenario_df, use_container_width=True, key="scenario_percent_editor")
-    except AttributeError:
-        edited_scenario_df = st.experimental_data_editor(scenario_df, use_container_width=True, key="scenario_percent_editor")
-
-    # Convert columns (except Item) to numeric
-    for col in edited_scenario_df.columns[1:]:
-        edited_scenario_df[col] = pd.to_numeric(edited_scenario_df[col], errors='coerce').fillna(100.0)
-
-    # Calculate scenario emissions and savings
-    results = []
-    for col in edited_scenario_df.columns[1:]:
-        usage_percentages = edited_scenario_df[col].values / 100.0
-        scenario_daily_emissions = (bau_data_ordered["Daily Usage (Units)"].values 
-                                    * usage_percentages 
-                                    * bau_data_ordered["Emission Factor (kg CO₂e/unit)"].values).sum()
-        scenario_annual_emissions = scenario_daily_emissions * 365
-        co2_saving_kg = total_annual_bau - scenario_annual_emissions
-        co2_saving_percent = (co2_saving_kg / total_annual_bau * 100) if total_annual_bau != 0 else 0
-
-        results.append({
-            "Scenario": col.replace(" (%)",""),  # Remove " (%)" from the scenario name
-            "Total Daily Emissions (kg CO₂e)": scenario_daily_emissions,
-            "Total Annual Emissions (kg CO₂e)": scenario_annual_emissions,
-            "CO₂ Saving (kg CO₂e/year)": co2_saving_kg,
-            "CO₂ Saving (%)": co2_saving_percent
-        })
-
-    results_df = pd.DataFrame(results)
-    # Reindex the results to start from 1
-    results_df.index = range(1, len(results_df) + 1)
+    # Editable table for scenario percentages, applied on submit
+    with st.form("scenario_form"):
+        try:
+            edited_scenario_df = st.data_editor(scenario_df, use_container_width=True, key="scenario_percent_editor")
+        except AttributeError:
+            edited_scenario_df = st.experimental_data_editor(scenario_df, use_container_width=True, key="scenario_percent_editor")
+        st.form_submit_button("Update Scenarios")
+
+    # Convert columns (except Item) to numeric in one block; blanks default to 100% (BAU)
+    percent_cols = edited_scenario_df.columns[1:]
+    percent_block = np.nan_to_num(
+        edited_scenario_df[percent_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64),
+        nan=100.0
+    )
+    edited_scenario_df[percent_cols] = percent_block
+
+    # Calculate scenario emissions and savings (cached on the BAU emissions and percentages)
+    results_df = compute_scenario_emissions(
+        [col.replace(" (%)", "") for col in percent_cols],  # Remove " (%)" from the scenario name
+        st.session_state.bau_daily_by_item,
+        percent_block,
+        total_annual_bau
+    )
 
     st.write("### Scenario Results")
     st.dataframe(results_df)
 
     st.subheader("CO₂ Savings Compared to BAU (%)")
-    st.bar_chart(results_df.set_index("Scenario")["CO₂ Saving (%)"], use_container_width=True)
+    co2_saving_series = pd.Series(
+        results_df["CO₂ Saving (%)"].to_numpy(),
+        index=pd.Index(results_df["Scenario"].to_numpy(), name="Scenario"),
+        name="CO₂ Saving (%)"
+    )
+    st.bar_chart(co2_saving_series, use_container_width=True)
 
     # Option to download scenario results as CSV
     st.download_button(
         label="Download Scenario Results as CSV",
-        data=results_df.to_csv(index=False),
+        data=dataframe_to_csv_bytes(results_df),
         file_name="scenario_results.csv",
         mime="text/csv"
     )
@@ -470,40 +962,8 @@ def main():
 
     st.write("Apart from the environmental impact (e.g., CO₂ saved) calculated above, which of the following criteria are also important to your organisation? Please select all that apply and then assign values for each scenario.")
 
-    # Define scale-based criteria globally, including 'Other - Negative Trend'
-    scale_criteria = {
-        "Technical Feasibility", 
-        "Supplier Reliability and Technology Readiness", 
-        "Implementation Complexity",
-        "Scalability", 
-        "Maintenance Requirements", 
-        "Regulatory Compliance", 
-        "Risk for Workforce Safety",
-        "Risk for Operations", 
-        "Impact on Product Quality", 
-        "Customer and Stakeholder Alignment",
-        "Priority for our organisation",
-        "Other - Negative Trend"  # For inversion
-    }
-
-    # Criteria options with brief, color-coded descriptions for the 1-10 scale criteria
-    criteria_options = {
-        "Technical Feasibility": "<span style='color:red;'>1-4: low feasibility</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: high feasibility</span>",
-        "Supplier Reliability and Technology Readiness": "<span style='color:red;'>1-4: unreliable/immature</span>, <span style='color:orange;'>5-6: mostly reliable</span>, <span style='color:green;'>7-10: highly reliable/mature</span>",
-        "Implementation Complexity": "<span style='color:red;'>1-4: very complex</span>, <span style='color:orange;'>5-6: moderate complexity</span>, <span style='color:green;'>7-10: easy to implement</span>",
-        "Scalability": "<span style='color:red;'>1-4: hard to scale</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: easy to scale</span>",
-        "Maintenance Requirements": "<span style='color:red;'>1-4: high maintenance</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: low maintenance</span>",
-        "Regulatory Compliance": "<span style='color:red;'>1-4: risk of non-compliance</span>, <span style='color:orange;'>5-6: mostly compliant</span>, <span style='color:green;'>7-10: fully compliant</span>",
-        "Risk for Workforce Safety": "<span style='color:red;'>1-4: significant safety risks</span>, <span style='color:orange;'>5-6: moderate risks</span>, <span style='color:green;'>7-10: very low risk</span>",
-        "Risk for Operations": "<span style='color:red;'>1-4: high operational risk</span>, <span style='color:orange;'>5-6: moderate risk</span>, <span style='color:green;'>7-10: minimal risk</span>",
-        "Impact on Product Quality": "<span style='color:red;'>1-4: reduces quality</span>, <span style='color:orange;'>5-6: acceptable</span>, <span style='color:green;'>7-10: improves or maintains quality</span>",
-        "Customer and Stakeholder Alignment": "<span style='color:red;'>1-4: low alignment</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: high alignment</span>",
-        "Priority for our organisation": "<span style='color:red;'>1-4: low priority</span>, <span style='color:orange;'>5-6: moderate</span>, <span style='color:green;'>7-10: top priority</span>",
-        "Initial investment (£)": "Enter the upfront cost needed (no scale limit).",
-        "Return on Investment (ROI)(years)": "Enter the time (in years) to recover the initial cost (no scale limit).",
-        "Other - Positive Trend": "Enter criteria where a higher number is more beneficial.",
-        "Other - Negative Trend": "Enter criteria where a higher number is less beneficial."
-    }
+    # Copy per run so user-defined "Other" criteria can be added
+    criteria_options = dict(CRITERIA_OPTIONS)
 
     # Let user select criteria
     selected_criteria = st.multiselect(
@@ -550,14 +1010,11 @@ def main():
         st.write("### Assign Criteria Values to Each Scenario")
         st.write("Double-click a cell to edit. For (1-10) criteria, only enter values between 1 and 10.")
 
-        # Create a DataFrame for criteria values
-        criteria_columns = ["Scenario"] + selected_criteria
-        criteria_data = []
-        for index, row in edited_scenario_desc_df.iterrows():
-            scenario = row["Scenario"]
-            criteria_values = [scenario] + [1 for _ in selected_criteria]  # Initialize with 1
-            criteria_data.append(criteria_values)
-        criteria_df = pd.DataFrame(criteria_data, columns=criteria_columns)
+        # Create a DataFrame for criteria values, built in one constructor call
+        scenario_names = edited_scenario_desc_df["Scenario"].tolist()
+        criteria_data = {"Scenario": scenario_names}
+        criteria_data.update({c: np.ones(len(scenario_names), dtype=np.int64) for c in selected_criteria})  # Initialize with 1
+        criteria_df = pd.DataFrame(criteria_data)
 
         # Define column configurations
         column_config = {
@@ -568,7 +1025,7 @@ def main():
         }
 
         for c in selected_criteria:
-            if c in scale_criteria:
+            if c in SCALE_CRITERIA:
                 column_config[c] = st.column_config.NumberColumn(
                     label=c,
                     format="%.0f",           # Ensures integer input
@@ -581,35 +1038,47 @@ def main():
                     # No additional constraints
                 )
 
-        # Editable table for criteria values with input constraints
-        try:
-            edited_criteria_df = st.data_editor(
-                criteria_df,
-                use_container_width=True,
-                key="criteria_editor_final",
-                num_rows="fixed",  # Fixed number of rows
-                disabled=False,
-                column_config=column_config,
-                hide_index=True
-            )
-        except TypeError as e:
-            st.error(f"Data Editor Error: {e}")
-            st.stop()
-        except AttributeError as e:
-            # Fallback for older Streamlit versions
-            edited_criteria_df = st.experimental_data_editor(
-                criteria_df,
-                use_container_width=True,
-                key="criteria_editor_final",
-                num_rows="fixed",  # Fixed number of rows
-                disabled=False
-            )
+        # Editable table for criteria values with input constraints, applied on submit
+        with st.form("criteria_form"):
+            try:
+                edited_criteria_df = st.data_editor(
+                    criteria_df,
+                    use_container_width=True,
+                    key="criteria_editor_final",
+                    num_rows="fixed",  # Fixed number of rows
+                    disabled=False,
+                    column_config=column_config,
+                    hide_index=True
+                )
+            except TypeError as e:
+                st.error(f"Data Editor Error: {e}")
+                st.stop()
+            except AttributeError as e:
+                # Fallback for older Streamlit versions
+                edited_criteria_df = st.experimental_data_editor(
+                    criteria_df,
+                    use_container_width=True,
+                    key="criteria_editor_final",
+                    num_rows="fixed",  # Fixed number of rows
+                    disabled=False
+                )
+            st.form_submit_button("Update Criteria")
 
-        # Convert columns (except Scenario) to numeric and enforce constraints
-        for col in edited_criteria_df.columns[1:]:
-            edited_criteria_df[col] = pd.to_numeric(edited_criteria_df[col], errors='coerce').fillna(1.0)
-            if col in scale_criteria:
-                edited_criteria_df[col] = edited_criteria_df[col].clip(lower=1.0, upper=10.0)
+        # Convert columns (except Scenario) to numeric and enforce constraints in one block
+        value_cols = edited_criteria_df.columns[1:]
+        criteria_block = np.nan_to_num(
+            edited_criteria_df[value_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64),
+            nan=1.0
+        )
+        # Clip only the 1-10 scale criteria, selected with a column mask
+        scale_mask = np.fromiter((col in SCALE_CRITERIA for col in value_cols), dtype=bool, count=len(value_cols))
+        criteria_block = np.where(scale_mask, np.clip(criteria_block, 1.0, 10.0), criteria_block)
+        edited_criteria_df[value_cols] = criteria_block
+
+        # Keep the numeric block itself for Run Model, so scoring needs no DataFrame-to-array conversion
+        st.session_state['criteria_array'] = criteria_block
+        st.session_state['criteria_names'] = list(value_cols)
+        st.session_state['criteria_scenarios'] = edited_criteria_df["Scenario"].tolist()
 
         # Save edited criteria to session state
         st.session_state['edited_criteria_df'] = edited_criteria_df
@@ -623,125 +1092,62 @@ def main():
             if st.session_state.edited_criteria_df.isnull().values.any():
                 st.error("Please ensure all criteria values are filled.")
             else:
-                # Create a copy for scaled results
-                scaled_criteria_df = st.session_state.edited_criteria_df.copy()
-
-                # Define specific criteria to normalize (if any)
-                criteria_to_normalize = ["Return on Investment (ROI)(years)", "Initial investment (£)", "Other - Positive Trend", "Other - Negative Trend"]
-
-                # Now scale each criterion
-                for crit in criteria_to_normalize:
-                    if crit in scaled_criteria_df.columns:
-                        try:
-                            values = scaled_criteria_df[crit].astype(float).values
-                        except:
-                            scaled_criteria_df[crit] = 5  # Assign neutral score if conversion fails
-                            values = scaled_criteria_df[crit].astype(float).values
-
-                        min_val = np.min(values)
-                        max_val = np.max(values)
-
-                        if crit == "Other - Positive Trend":
-                            # Higher is better: scale to 10
-                            if max_val == min_val:
-                                scaled_values = np.ones_like(values) * 10 if min_val != 0 else np.zeros_like(values)
-                            else:
-                                scaled_values = 1 + 9 * (values - min_val) / (max_val - min_val)
-                            scaled_criteria_df[crit] = scaled_values
-                        elif crit == "Other - Negative Trend":
-                            # Higher is worse: reverse scale
-                            if max_val == min_val:
-                                scaled_values = np.ones_like(values) * 10 if min_val != 0 else np.zeros_like(values)
-                            else:
-                                scaled_values = 10 - 9 * (values - min_val) / (max_val - min_val)
-                            scaled_criteria_df[crit] = scaled_values
-                        elif crit == "Return on Investment (ROI)(years)":
-                            # Lower ROI is better: reverse scale
-                            if max_val == min_val:
-                                scaled_values = np.ones_like(values) * 10 if min_val != 0 else np.zeros_like(values)
-                            else:
-                                scaled_values = 10 - 9 * (values - min_val) / (max_val - min_val)
-                            scaled_criteria_df[crit] = scaled_values
-                        elif crit == "Initial investment (£)":
-                            # Lower investment is better: reverse scale
-                            if max_val == min_val:
-                                scaled_values = np.ones_like(values) * 10 if min_val != 0 else np.zeros_like(values)
-                            else:
-                                scaled_values = 10 - 9 * (values - min_val) / (max_val - min_val)
-                            scaled_criteria_df[crit] = scaled_values
-
-                # Calculate the total score by summing all criteria
-                scaled_criteria_df['Total Score'] = scaled_criteria_df[selected_criteria].sum(axis=1)
-
-                # Normalize the total scores between 1 and 10
-                min_score = scaled_criteria_df['Total Score'].min()
-                max_score = scaled_criteria_df['Total Score'].max()
-                if max_score != min_score:
-                    scaled_criteria_df['Normalized Score'] = 1 + 9 * (scaled_criteria_df['Total Score'] - min_score) / (max_score - min_score)
-                else:
-                    scaled_criteria_df['Normalized Score'] = 5  # Assign a neutral score if all scores are equal
-
-                # Assign colors based on normalized scores
-                def get_color(score):
-                    if score >= 7:
-                        return 'green'
-                    elif score >= 5:
-                        return 'yellow'
-                    else:
-                        return 'red'
-
-                scaled_criteria_df['Color'] = scaled_criteria_df['Normalized Score'].apply(get_color)
-
-                # Rank the scenarios based on Normalized Score
-                scaled_criteria_df['Rank'] = scaled_criteria_df['Normalized Score'].rank(method='min', ascending=False).astype(int)
+                scaled_criteria_df, rank_order = score_scenarios(
+                    st.session_state.criteria_scenarios,
+                    st.session_state.criteria_names,
+                    st.session_state.criteria_array,
+                    selected_criteria
+                )
 
                 st.write("### Normalized Results (All Criteria Scaled 1-10)")
-                st.dataframe(scaled_criteria_df.round(2))
-
-                # Visualize the normalized scores with color gradients using Altair
-                chart = alt.Chart(scaled_criteria_df).mark_bar().encode(
-                    x=alt.X('Scenario:N', sort='-y'),
-                    y='Normalized Score:Q',
-                    color=alt.Color('Normalized Score:Q',
-                                    scale=alt.Scale(
-                                        domain=[1, 5, 10],
-                                        range=['red', 'yellow', 'green']
-                                    ),
-                                    legend=alt.Legend(title="Normalized Score"))
-                ).properties(
-                    width=700,
-                    height=400,
-                    title="Scenario Scores (Normalized 1-10)"
+                # Format floats to 2 decimals at render time instead of copying the frame with round()
+                st.dataframe(
+                    scaled_criteria_df,
+                    column_config={
+                        col: st.column_config.NumberColumn(col, format="%.2f")
+                        for col in scaled_criteria_df.select_dtypes('float').columns
+                    }
                 )
 
-                st.altair_chart(chart, use_container_width=True)
+                # Visualize the normalized scores in their traffic-light colors from the prebuilt spec
+                score_records = tuple(scaled_criteria_df[['Scenario', 'Normalized Score', 'Color']].itertuples(index=False, name=None))
+                st.vega_lite_chart(build_score_chart_spec(score_records), use_container_width=True)
 
                 # ----------------------- Enhanced Visualization -----------------------
 
-                # Create a styled dataframe with ranking and color-coded cells
-                styled_display = scaled_criteria_df[['Scenario', 'Normalized Score', 'Rank']].copy()
-                styled_display = styled_display.sort_values('Rank')
-
-                # Apply color formatting based on 'Normalized Score'
-                def color_cell(score):
-                    if score >= 7:
-                        return 'background-color: green'
-                    elif score >= 5:
-                        return 'background-color: yellow'
-                    else:
-                        return 'background-color: red'
-
-                # Style the 'Normalized Score' column
-                styled_display_style = styled_display.style.applymap(color_cell, subset=['Normalized Score'])
-
-                st.write("### Ranked Scenarios with Gradient Colors")
-                st.dataframe(styled_display_style)
+                # Create a ranked dataframe by gathering rows in ranking order (no copy + sort_values);
+                # the plain-text Color column is swapped for a marker and label the table can show
+                ranked_df = scaled_criteria_df.iloc[rank_order]
+                styled_display = pd.DataFrame({
+                    'Scenario': ranked_df['Scenario'].to_numpy(),
+                    'Normalized Score': ranked_df['Normalized Score'].to_numpy(),
+                    'Grade': [
+                        f"{SCORE_BUCKET_MARKERS[color]} {SCORE_BUCKET_LABELS[color]}"
+                        for color in ranked_df['Color'].to_numpy()
+                    ],
+                    'Rank': ranked_df['Rank'].to_numpy()
+                })
+
+                st.write("### Ranked Scenarios with Traffic-Light Grades")
+                st.dataframe(
+                    styled_display,
+                    hide_index=True,
+                    column_config={
+                        "Normalized Score": st.column_config.ProgressColumn(
+                            "Normalized Score",
+                            format="%.2f",
+                            min_value=1,
+                            max_value=10
+                        ),
+                        "Grade": st.column_config.TextColumn("Grade")
+                    }
+                )
 
                 # ----------------------- Highlight Top Scenario -----------------------
 
-                top_scenario = scaled_criteria_df.loc[scaled_criteria_df['Rank'] == 1, 'Scenario'].values
-                if len(top_scenario) > 0:
-                    st.success(f"The top-ranked scenario is **{top_scenario[0]}** with the highest carbon savings.")
+                # The first position in the ranking order is the top scenario
+                top_scenario = scaled_criteria_df['Scenario'].iat[int(rank_order[0])]
+                st.success(f"The top-ranked scenario is **{top_scenario}** with the highest carbon savings.")
 
 if __name__ == "__main__":
     main()